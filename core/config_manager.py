@@ -1,6 +1,48 @@
 import os
 import json
-from typing import Dict, Any
+import copy
+import mmap
+import functools
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 默认配置文件路径
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "default_config.json"
+
+@functools.lru_cache(maxsize=1)
+def _read_default_config(mtime: float) -> MappingProxyType:
+    """读取并解析默认配置，按文件修改时间缓存"""
+    if orjson is None:
+        return MappingProxyType(json.loads(DEFAULT_CONFIG_PATH.read_bytes()))
+    
+    # orjson可直接解析内存映射的文件内容，省去一次读取拷贝
+    with open(DEFAULT_CONFIG_PATH, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return MappingProxyType(orjson.loads(view))
+
+def load_default_config() -> Optional[Dict[str, Any]]:
+    """获取默认配置的副本，文件未修改时直接使用缓存的解析结果
+    
+    Returns:
+        Optional[Dict[str, Any]]: 默认配置字典，文件不存在、为空或格式错误时返回None
+    """
+    try:
+        mtime = DEFAULT_CONFIG_PATH.stat().st_mtime
+        default_config = _read_default_config(mtime)
+    except OSError:
+        return None
+    except (ValueError, TypeError) as e:
+        # 空文件（mmap报ValueError）、JSON格式错误或顶层不是对象，回退到内置默认配置
+        print(f"加载默认配置文件失败: {e}")
+        return None
+    # 返回深拷贝，防止调用方修改污染缓存
+    return copy.deepcopy(dict(default_config))
 
 class ConfigManager:
     def __init__(self):
@@ -17,10 +59,8 @@ class ConfigManager:
         
         if not os.path.exists(self.config_file):
             # 如果用户配置不存在，复制默认配置
-            if os.path.exists(self.default_config_file):
-                with open(self.default_config_file, 'r', encoding='utf-8') as f:
-                    default_config = json.load(f)
-            else:
+            default_config = load_default_config()
+            if default_config is None:
                 default_config = {
                     "download_path": "",
                     "default_video_quality": "1080p",
@@ -58,6 +98,10 @@ class ConfigManager:
             print(f"保存配置文件失败: {e}")
             return False
 
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前配置字典（引用，调用方只读）"""
+        return self.config
+
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置项"""
         return self.config.get(key, default)
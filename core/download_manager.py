@@ -8,7 +8,7 @@ from dataclasses import dataclass, field
 from queue import Queue, Empty
 from PyQt6.QtCore import QObject, pyqtSignal
 
-from core.downloader import VideoDownloader
+from core.downloader import VideoDownloader, format_speed
 from core.logger import Logger, log, log_exception
 
 class TaskStatus(Enum):
@@ -113,8 +113,8 @@ class DownloadManager:
             
             # 连接信号
             downloader.signals.progress_updated.connect(
-                lambda percent, speed, task_id=task.id: 
-                self._on_progress_updated(task_id, percent, speed)
+                lambda percent, speed_bps, state, task_id=task.id: 
+                self._on_progress_updated(task_id, percent, speed_bps)
             )
             downloader.signals.download_finished.connect(
                 lambda output_path, task_id=task.id: 
@@ -201,6 +201,10 @@ class DownloadManager:
             # 更新任务状态
             task.status = TaskStatus.WAITING
             
+            # 清除暂停时设置的取消标记
+            if task_id in self.downloader_map:
+                self.downloader_map[task_id].reset_cancel()
+            
             # 添加到等待队列
             self.waiting_queue.put(task_id)
             
@@ -429,14 +433,15 @@ class DownloadManager:
                     # 标记队列任务完成
                     self.waiting_queue.task_done()
     
-    def _on_progress_updated(self, task_id: str, percent: float, speed: str):
+    def _on_progress_updated(self, task_id: str, percent: float, speed_bps: int):
         """进度更新回调
         
         Args:
             task_id: 任务ID
             percent: 进度百分比
-            speed: 下载速度
+            speed_bps: 下载速度（字节/秒）
         """
+        speed = format_speed(speed_bps)
         with self.lock:
             if task_id in self.tasks:
                 task = self.tasks[task_id]
@@ -1,12 +1,11 @@
 import os
 import re
-import traceback
 import time
 import json
 import functools
-import signal
 import sys
 import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Callable, Any
 from dataclasses import dataclass
@@ -15,8 +14,20 @@ from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 import yt_dlp
 import subprocess
 
-# 全局变量，用于跟踪当前的yt-dlp进程
-YDL_INSTANCE = None
+from core.logger import log
+
+# 进度状态，随progress_updated信号发送
+STATE_DOWNLOADING = 0  # 下载中
+STATE_PREPARING = 1    # 准备下载
+STATE_PROCESSING = 2   # 下载完成，正在处理/合并
+
+# 视频信息缓存容量及视频ID提取规则
+INFO_CACHE_SIZE = 32
+_VIDEO_ID_RE = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([\w-]{11})')
+
+def format_speed(speed_bps: int) -> str:
+    """将字节/秒格式化为MB/s显示文本"""
+    return f"{speed_bps / 1048576:.2f} MB/s"
 
 @dataclass
 class FormatInfo:
@@ -24,6 +35,7 @@ class FormatInfo:
     id: str
     desc: str
     ext: str
+    sort_key: float = 0  # 排序依据（视频为高度，音频为码率）
 
 @dataclass
 class SubtitleInfo:
@@ -33,8 +45,10 @@ class SubtitleInfo:
 
 class DownloadSignals(QObject):
     """下载信号类"""
-    progress_updated = pyqtSignal(float, str)
+    progress_updated = pyqtSignal(float, int, int)  # 进度百分比, 速度(字节/秒), 状态
     info_loaded = pyqtSignal(list, list, list)
+    media_info_loaded = pyqtSignal(str, list, list, list)  # 请求的URL, 视频格式, 音频格式, 字幕
+    analysis_status = pyqtSignal(str)  # 视频信息分析阶段提示
     download_finished = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
 
@@ -45,7 +59,8 @@ def catch_exceptions(func):
         try:
             return func(self, *args, **kwargs)
         except Exception as e:
-            error_msg = f"{func.__name__}失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception(f"{func.__name__}失败")
+            error_msg = f"{func.__name__}失败: {str(e)}"
             if hasattr(self, 'signals') and hasattr(self.signals, 'error_occurred'):
                 self.signals.error_occurred.emit(error_msg)
             return None
@@ -82,11 +97,14 @@ class VideoDownloader:
         # 进度相关
         self.current_percent = 0  # 当前实际进度
         self.display_percent = 0  # 显示的进度
-        self.last_speed = "0.00 MB/s"
+        self.last_speed = 0  # 上次速度（字节/秒）
         self.last_update_time = 0  # 上次更新时间
-        self.update_interval = 0.1  # 更新间隔（秒）
+        self.update_interval = 0.05  # 更新间隔（秒），进度信号最高约20Hz
         self.is_merging = False  # 是否正在合并文件
-        self.is_canceled = False  # 取消标志
+        self._cancel_event = threading.Event()  # 取消事件，由进度回调轮询
+        # 视频信息LRU缓存: 视频ID -> (视频格式, 音频格式, 字幕语言)
+        self._info_cache = OrderedDict()
+        self._info_cache_lock = threading.Lock()
     
     def _load_config(self) -> Dict:
         """加载配置文件"""
@@ -165,7 +183,8 @@ class VideoDownloader:
                 formats.append(FormatInfo(
                     id=fmt['format_id'],
                     desc=f"{fmt.get('height', '?')}p {fmt.get('ext', '')}",
-                    ext=fmt.get('ext', '')
+                    ext=fmt.get('ext', ''),
+                    sort_key=fmt.get('height') or 0
                 ))
         return formats
     
@@ -177,7 +196,8 @@ class VideoDownloader:
                 formats.append(FormatInfo(
                     id=fmt['format_id'],
                     desc=f"{fmt.get('abr', '?')}kbps {fmt.get('ext', '')}",
-                    ext=fmt.get('ext', '')
+                    ext=fmt.get('ext', ''),
+                    sort_key=fmt.get('abr') or 0
                 ))
         return formats
     
@@ -212,6 +232,27 @@ class VideoDownloader:
         subtitle_langs.sort(key=lambda x: x.code)
         return subtitle_langs
     
+    def _info_cache_key(self, url: str) -> str:
+        """生成视频信息缓存键，优先使用视频ID以忽略链接中的无关参数"""
+        match = _VIDEO_ID_RE.search(url)
+        return match.group(1) if match else url.strip()
+    
+    def get_cached_media_info(self, url: str) -> bool:
+        """命中缓存时直接发送info_loaded信号
+        
+        Returns:
+            bool: 命中缓存返回True，否则返回False
+        """
+        key = self._info_cache_key(url)
+        with self._info_cache_lock:
+            cached = self._info_cache.get(key)
+            if cached is None:
+                return False
+            self._info_cache.move_to_end(key)
+        self.signals.info_loaded.emit(*cached)
+        self.signals.media_info_loaded.emit(url, *cached)
+        return True
+    
     def get_media_info(self, url: str) -> bool:
         """获取视频元数据"""
         try:
@@ -221,6 +262,8 @@ class VideoDownloader:
             if not self._validate_url(url):
                 raise ValueError("无效的YouTube链接")
             
+            self.signals.analysis_status.emit("正在分析视频信息...")
+            
             # 创建临时选项，不包含postprocessors
             temp_opts = {k: v for k, v in self.ydl_opts.items() if k != 'postprocessors'}
             temp_opts['extract_flat'] = True
@@ -231,6 +274,8 @@ class VideoDownloader:
                 if not info:
                     raise ValueError("无法获取视频信息")
                 
+                self.signals.analysis_status.emit("正在解析可用格式...")
+                
                 # 获取各种格式信息
                 video_formats = self._get_video_formats(info)
                 audio_formats = self._get_audio_formats(info)
@@ -242,16 +287,28 @@ class VideoDownloader:
                 if not audio_formats:
                     raise ValueError("未找到可用的音频格式")
                 
-                # 发送信号
-                self.signals.info_loaded.emit(
+                result = (
                     [vars(f) for f in video_formats],
                     [vars(f) for f in audio_formats],
                     [vars(s) for s in subtitle_langs]
                 )
+                
+                # 写入缓存，超出容量时淘汰最久未使用的条目
+                key = self._info_cache_key(url)
+                with self._info_cache_lock:
+                    self._info_cache[key] = result
+                    self._info_cache.move_to_end(key)
+                    if len(self._info_cache) > INFO_CACHE_SIZE:
+                        self._info_cache.popitem(last=False)
+                
+                # 发送信号
+                self.signals.info_loaded.emit(*result)
+                self.signals.media_info_loaded.emit(url, *result)
                 return True
                 
         except Exception as e:
-            error_msg = f"获取视频信息失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception("获取视频信息失败")
+            error_msg = f"获取视频信息失败: {str(e)}"
             self.signals.error_occurred.emit(error_msg)
             return False
     
@@ -263,11 +320,11 @@ class VideoDownloader:
 
     def _progress_hook(self, d: Dict) -> None:
         """进度回调函数"""
+        # 检查是否已取消，抛出异常以中止yt-dlp下载
+        if self._cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled("下载已取消")
+            
         try:
-            # 检查是否已取消
-            if self.is_canceled:
-                raise Exception("下载已取消")
-                
             if d['status'] == 'downloading':
                 # 获取下载信息
                 downloaded = d.get('downloaded_bytes', 0)
@@ -287,21 +344,18 @@ class VideoDownloader:
                     # 获取真实进度（不再平滑处理）
                     real_percent = self._update_progress(current_percent)
                     
-                    # 格式化速度显示
-                    if speed:
-                        speed_str = f"{speed/1024/1024:.2f} MB/s"
-                    else:
-                        speed_str = self.last_speed
+                    # 速度未知时沿用上一次的速度
+                    speed_bps = int(speed) if speed else self.last_speed
                     
                     # 更新上一次的速度
-                    self.last_speed = speed_str
+                    self.last_speed = speed_bps
                     
                     # 控制更新频率，保证UI响应性的同时保持实时更新
-                    current_time = time.time()
-                    if current_time - self.last_update_time >= self.update_interval:
+                    current_time = time.monotonic()
+                    if real_percent >= 100 or current_time - self.last_update_time >= self.update_interval:
                         self.last_update_time = current_time
                         # 发送进度更新信号
-                        self.signals.progress_updated.emit(real_percent, speed_str)
+                        self.signals.progress_updated.emit(real_percent, speed_bps, STATE_DOWNLOADING)
                     
             elif d['status'] == 'finished':
                 # 打印换行以结束进度显示
@@ -311,39 +365,25 @@ class VideoDownloader:
                 self.is_merging = True
                 # 从90%开始处理合并阶段
                 self.current_percent = 90
-                self.signals.progress_updated.emit(90, "处理中...")
+                self.signals.progress_updated.emit(90, self.last_speed, STATE_PROCESSING)
                 
             elif d['status'] == 'error':
                 error_msg = d.get('error', '下载出错')
                 self.signals.error_occurred.emit(error_msg)
                 
         except Exception as e:
-            error_msg = f"更新进度失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception("更新进度失败")
+            error_msg = f"更新进度失败: {str(e)}"
             self.signals.error_occurred.emit(error_msg)
 
+    def reset_cancel(self):
+        """清除取消标记，在下载任务创建或恢复时调用，而不是在download()内部，避免丢失排队期间的取消请求"""
+        self._cancel_event.clear()
+
     def cancel_download(self):
-        """取消下载 - 强制终止下载进程"""
-        global YDL_INSTANCE
-        
-        self.is_canceled = True
-        print("\n正在终止下载进程...")
-        
-        # 终止下载进程
-        if YDL_INSTANCE:
-            try:
-                # 对于Windows系统
-                if os.name == 'nt':
-                    # 创建终止线程
-                    def terminator():
-                        time.sleep(0.5)  # 稍等片刻让UI响应
-                        os._exit(1)  # 强制终止进程
-                    
-                    threading.Thread(target=terminator, daemon=True).start()
-                # 对于类Unix系统
-                else:
-                    os.kill(os.getpid(), signal.SIGINT)
-            except:
-                pass
+        """取消下载 - 仅设置取消事件并立即返回，由进度回调在下载线程中中止下载"""
+        self._cancel_event.set()
+        print("\n正在取消下载...")
         
         # 通知UI取消完成
         self.signals.error_occurred.emit("下载已取消")
@@ -388,23 +428,24 @@ class VideoDownloader:
                 return True
                 
         except Exception as e:
-            error_msg = f"下载字幕失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception("下载字幕失败")
+            error_msg = f"下载字幕失败: {str(e)}"
             self.signals.error_occurred.emit(error_msg)
             return False
 
     def download(self, url: str, video_fmt: str, audio_fmt: str, subtitle_lang: Optional[str] = None) -> bool:
         """下载视频"""
         try:
-            if self.is_canceled:
-                return False
-                
             self.download_started = False
             self.current_percent = 0
             self.display_percent = 0
-            self.last_speed = "0.00 MB/s"
+            self.last_speed = 0
             self.last_update_time = 0
             self.is_merging = False
             
+            # 在首个进度回调之前通知界面进入准备阶段
+            self.signals.progress_updated.emit(0, 0, STATE_PREPARING)
+            
             # 获取视频信息
             with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
@@ -426,10 +467,18 @@ class VideoDownloader:
                 # 设置下载格式
                 self.ydl_opts['format'] = f'{video_fmt}+{audio_fmt}/best'
                 
+                # 获取信息期间已被取消
+                if self._cancel_event.is_set():
+                    return False
+                
                 # 下载视频
                 with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
                     ydl.download([url])
                 
+                # 下载过程中被取消
+                if self._cancel_event.is_set():
+                    return False
+                
                 # 下载字幕
                 if subtitle_lang:
                     self.download_subtitles(url, subtitle_lang)
@@ -441,9 +490,13 @@ class VideoDownloader:
                 self._open_download_folder()
                 
                 return True
-                
+        
+        except yt_dlp.utils.DownloadCancelled:
+            # 由进度回调主动中止，cancel_download已通知界面
+            return False
         except Exception as e:
-            error_msg = f"下载失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception("下载失败")
+            error_msg = f"下载失败: {str(e)}"
             self.signals.error_occurred.emit(error_msg)
             return False
 
@@ -491,7 +544,8 @@ class VideoDownloader:
             return output_path
             
         except Exception as e:
-            error_msg = f"合并音视频失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception("合并音视频失败")
+            error_msg = f"合并音视频失败: {str(e)}"
             self.signals.error_occurred.emit(error_msg)
             return None
 
@@ -518,7 +572,8 @@ class VideoDownloader:
             return True
             
         except Exception as e:
-            error_msg = f"合并字幕失败: {str(e)}\n{traceback.format_exc()}"
+            log.exception("合并字幕失败")
+            error_msg = f"合并字幕失败: {str(e)}"
             self.signals.error_occurred.emit(error_msg)
             return False
 
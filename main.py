@@ -243,6 +243,7 @@ from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtGui import QIcon
 from PyQt6.QtCore import QSize
 from ui.main_window import MainWindow
+from ui.theme_manager import get_theme_manager
 
 
 def check_dependencies(gui_mode=False):
@@ -435,12 +436,17 @@ def main():
         # 初始化应用程序对象
         app = QApplication(sys.argv)
         
+        # 在创建任何窗口前应用主题（包含Fusion样式），避免启动时的调色板闪烁
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        theme_manager = get_theme_manager()
+        theme_manager.apply_theme()
+        
+        # 在后台加载用户主题目录，不阻塞窗口创建
+        theme_manager.scan_theme_directory_async(os.path.join(base_dir, "themes"))
+        
         # 检查并更新依赖包版本，使用GUI模式
         check_dependencies(gui_mode=True)
         
-        # 设置应用程序样式为Fusion
-        app.setStyle('Fusion')
-        
         # 加载多尺寸应用图标
         app_icon = QIcon()
         assets_dir = os.path.join(os.path.dirname(__file__), "assets")
@@ -1,6 +1,6 @@
 import os
 import re
-import traceback
+import functools
 import uuid
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -8,41 +8,349 @@ from PyQt6.QtWidgets import (
     QProgressBar, QFileDialog, QMessageBox, QTextEdit,
     QApplication, QTabWidget, QSplitter, QToolBar, QMenu
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QMutex, QElapsedTimer, QTimer, QPropertyAnimation, QSize
-from PyQt6.QtGui import QFont, QIcon, QAction
-from core.downloader import VideoDownloader
+from PyQt6.QtCore import Qt, QEvent, QObject, QRunnable, QThreadPool, QSignalBlocker, QSortFilterProxyModel, pyqtSignal, QTimer, QSize
+from PyQt6.QtGui import QFont, QIcon, QAction, QStandardItem, QStandardItemModel
+from core.downloader import VideoDownloader, STATE_PREPARING, STATE_PROCESSING
 from core.download_manager import DownloadManager, DownloadTask, TaskStatus
+from core.logger import log
 from ui.download_task_widget import DownloadTaskWidget
 from ui.theme_manager import get_theme_manager
+from ui.settings_dialog import SettingsDialog
 
-class DownloadThread(QThread):
+# 常用Qt常量，预先解析以避免构建界面时重复查找属性链
+_ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter
+_WIN_FLAGS = Qt.WindowType.Window | Qt.WindowType.WindowCloseButtonHint | Qt.WindowType.WindowMinimizeButtonHint
+
+# 下拉框排序键所在的数据角色
+_SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# 工具栏图标尺寸，进程内只创建一次
+_TOOLBAR_ICON_SIZE = QSize(24, 24)
+
+# YouTube链接匹配规则及快速前缀预筛选
+_YT_URL_RE = re.compile(r'^(https?://)?(www\.)?(youtube\.com|youtu\.be)/')
+_URL_PREFIXES = ('http', 'www.', 'youtube', 'youtu.be')
+
+# 进度文本模板，预先绑定format方法供高频进度槽函数使用
+_SPEED_FMT = "下载速度: {:.2f} MB/s".format
+_PCT_FMT = "正在下载: {:.1f}%".format
+
+# traceback模块仅在实际格式化堆栈时才导入
+_tb = None
+
+def _get_tb():
+    global _tb
+    if _tb is None:
+        import traceback as _tb
+    return _tb
+
+# 主窗口样式表（模块级常量，由主题管理器统一应用到QApplication）
+_MAIN_STYLESHEET = """
+    /* 全局样式 */
+    QMainWindow {
+        background-color: #FFFFFF;
+    }
+    
+    QWidget {
+        font-family: "Microsoft YaHei", "微软雅黑";
+        color: #333333;
+    }
+    
+    QPushButton {
+        background-color: #4361EE;
+        color: white;
+        border: none;
+        padding: 10px 24px;
+        border-radius: 6px;
+        font-size: 13px;
+        font-weight: 500;
+    }
+    
+    QPushButton:hover {
+        background-color: #3A56D4;
+    }
+    
+    QPushButton:pressed {
+        background-color: #2E4BBB;
+    }
+    
+    QPushButton:disabled {
+        background-color: #B8C0E0;
+    }
+    
+    QLineEdit {
+        border: 1px solid #E0E0E0;
+        border-radius: 6px;
+        padding: 10px 14px;
+        background: white;
+        selection-background-color: #E7EAFC;
+        font-size: 13px;
+    }
+    
+    QLineEdit:focus {
+        border: 1px solid #4361EE;
+    }
+    
+    QComboBox {
+        border: 1px solid #E0E0E0;
+        border-radius: 6px;
+        padding: 10px 14px;
+        background: white;
+        font-size: 13px;
+        min-width: 150px;
+    }
+    
+    QComboBox:focus {
+        border: 1px solid #4361EE;
+    }
+    
+    QComboBox::drop-down {
+        border: none;
+        width: 20px;
+    }
+    
+    QComboBox::down-arrow {
+        image: url(down_arrow.png);
+        width: 12px;
+        height: 12px;
+    }
+    
+    QProgressBar {
+        border: none;
+        background-color: #F0F2FA;
+        height: 10px;
+        border-radius: 5px;
+        margin-top: 4px;
+        margin-bottom: 4px;
+    }
+    
+    QProgressBar::chunk {
+        background-color: #4CC9F0;
+        border-radius: 5px;
+    }
+    
+    QLabel {
+        color: #333333;
+        font-size: 13px;
+        font-weight: 400;
+    }
+    
+    QTextEdit {
+        border: 1px solid #E0E0E0;
+        border-radius: 6px;
+        padding: 10px;
+        background: white;
+        font-size: 13px;
+        line-height: 1.5;
+    }
+    
+    QTextEdit:focus {
+        border: 1px solid #4361EE;
+    }
+    
+    #status_label {
+        color: #4361EE;
+        font-weight: 600;
+        font-size: 14px;
+    }
+    
+    #speed_label {
+        color: #4CC9F0;
+        font-size: 13px;
+        font-weight: 500;
+    }
+    
+    #analysis_label {
+        color: #555555;
+        font-size: 13px;
+    }
+    
+    /* 多任务下载界面样式已移除 */
+    
+    /* 多任务按钮样式已移除 */
+    
+    /* 单任务下载界面按钮样式 */
+    #download_button {
+        background-color: #06D6A0;
+        color: white;
+        border: none;
+        padding: 10px 24px;
+        border-radius: 6px;
+        font-size: 13px;
+        font-weight: 500;
+    }
+    
+    #download_button:hover {
+        background-color: #05C190;
+    }
+    
+    #download_button:pressed {
+        background-color: #04AC80;
+    }
+    
+    #cancel_button {
+        background-color: #EF476F;
+        color: white;
+        border: none;
+        padding: 10px 24px;
+        border-radius: 6px;
+        font-size: 13px;
+        font-weight: 500;
+    }
+    
+    #cancel_button:hover {
+        background-color: #E43065;
+    }
+    
+    #cancel_button:pressed {
+        background-color: #D4205B;
+    }
+    
+    #browse_button, #multi_parse_button, #parse_button {
+        background-color: #4361EE;
+        color: white;
+        border: none;
+        padding: 10px 24px;
+        border-radius: 6px;
+        font-size: 13px;
+        font-weight: 500;
+    }
+    
+    #browse_button:hover, #multi_parse_button:hover, #parse_button:hover {
+        background-color: #3A56D4;
+    }
+    
+    #browse_button:pressed, #multi_parse_button:pressed, #parse_button:pressed {
+        background-color: #2A46C4;
+    }
+    
+    /* 多任务按钮样式选择器已移除 */
+"""
+
+# 窗口图标文件（绝对路径及尺寸），导入时只检查一次文件是否存在
+_ASSETS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets")
+_ICON_PATHS = tuple(
+    (path, size)
+    for icon_file, size in (("icon-32-32.ico", 32), ("icon-48-48.ico", 48), ("icon-256-256.ico", 256))
+    if os.path.exists(path := os.path.join(_ASSETS, icon_file))
+)
+del path  # 推导式中的赋值表达式会绑定到模块命名空间
+
+@functools.lru_cache(maxsize=None)
+def _window_icon():
+    """构建多尺寸窗口图标，结果缓存以避免重复构建"""
+    window_icon = QIcon()
+    for icon_path, size in _ICON_PATHS:
+        window_icon.addFile(icon_path, size=QSize(size, size))
+    
+    # 图标文件缺失时使用系统主题图标
+    if window_icon.isNull():
+        window_icon = QIcon.fromTheme("applications-multimedia")
+    return window_icon
+
+@functools.lru_cache(maxsize=None)
+def _ui_font():
+    """界面字体，需在QApplication创建后构建，结果缓存"""
+    return QFont("Microsoft YaHei", 13)
+
+def _install_sort_proxy(combo, order):
+    """为下拉框安装排序代理模型，按_SORT_ROLE在C++中排序，返回用于填充的源模型"""
+    source = QStandardItemModel(combo)
+    proxy = QSortFilterProxyModel(combo)
+    proxy.setSourceModel(source)
+    proxy.setSortRole(_SORT_ROLE)
+    # 关闭动态排序，填充完成后统一排序一次
+    proxy.setDynamicSortFilter(False)
+    proxy.sort(0, order)
+    combo.setModel(proxy)
+    return source
+
+def _bulk_fill(combo, source, items):
+    """批量填充下拉框，期间屏蔽信号和重绘，只触发一次布局更新和一次排序
+    
+    Args:
+        combo: 已通过_install_sort_proxy安装排序代理的下拉框
+        source: 下拉框的源模型
+        items: (显示文本, 数据, 排序键) 序列
+    """
+    combo.blockSignals(True)
+    combo.setUpdatesEnabled(False)
+    combo.view().setUpdatesEnabled(False)
+    try:
+        source.removeRows(0, source.rowCount())
+        for text, data, sort_key in items:
+            item = QStandardItem(text)
+            item.setData(data, Qt.ItemDataRole.UserRole)
+            item.setData(sort_key, _SORT_ROLE)
+            source.appendRow(item)
+        proxy = combo.model()
+        proxy.sort(0, proxy.sortOrder())
+    finally:
+        combo.view().setUpdatesEnabled(True)
+        combo.setUpdatesEnabled(True)
+        combo.blockSignals(False)
+
+class _InfoFetcherSignals(QObject):
+    """视频信息获取任务信号类（QRunnable本身不能定义信号）"""
+    finished = pyqtSignal(str)  # 获取结束（无论成功与否），参数为请求的URL
+
+class _InfoFetcher(QRunnable):
+    """在线程池中获取视频信息，结果通过下载器的信号回传到GUI线程"""
+
+    def __init__(self, downloader, url):
+        super().__init__()
+        self.signals = _InfoFetcherSignals()
+        self.downloader = downloader
+        self.url = url
+
+    def run(self):
+        try:
+            self.downloader.get_media_info(self.url)
+        finally:
+            self.signals.finished.emit(self.url)
+
+class DownloadJobSignals(QObject):
+    """下载任务信号类（QRunnable本身不能定义信号）"""
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
+class DownloadJob(QRunnable):
+    """下载任务，提交到全局线程池中执行，复用池内线程"""
+
     def __init__(self, downloader, url, video_fmt, audio_fmt, subtitle_lang=None):
         super().__init__()
+        # 由MainWindow持有引用，避免线程池执行后删除对象导致取消时访问失效
+        self.setAutoDelete(False)
+        self.signals = DownloadJobSignals()
         self.downloader = downloader
         self.url = url
         self.video_fmt = video_fmt
         self.audio_fmt = audio_fmt
         self.subtitle_lang = subtitle_lang
         self.is_canceled = False
+        # 在任务创建时清除上一次的取消标记，此后到来的取消请求不会被丢弃
+        downloader.reset_cancel()
 
     def run(self):
+        # 任务在线程池中排队期间已被取消
+        if self.is_canceled:
+            self.signals.error.emit("下载已取消")
+            return
         try:
             success = self.downloader.download(self.url, self.video_fmt, self.audio_fmt, self.subtitle_lang)
             if self.is_canceled:
-                self.error.emit("下载已取消")
+                self.signals.error.emit("下载已取消")
             elif success:
-                self.finished.emit("下载完成")
+                self.signals.finished.emit("下载完成")
             else:
-                self.error.emit("下载失败")
+                self.signals.error.emit("下载失败")
         except Exception as e:
-            error_msg = f"下载线程错误: {str(e)}\n{traceback.format_exc()}"
-            self.error.emit(error_msg)
+            log.exception("下载线程错误")
+            error_msg = f"下载线程错误: {str(e)}"
+            self.signals.error.emit(error_msg)
             
     def cancel(self):
-        """取消下载"""
+        """取消下载（由GUI线程直接调用）"""
         self.is_canceled = True
         # 通知下载器进程停止下载
         if hasattr(self.downloader, 'cancel_download'):
@@ -60,21 +368,30 @@ class MainWindow(QMainWindow):
         # 初始化主题管理器
         self.theme_manager = get_theme_manager()
         
-        # 互斥锁和定时器
-        self.mutex = QMutex()
-        self.timer = QElapsedTimer()
-        self.analysis_timer = QTimer()
-        self.analysis_timer.timeout.connect(self._check_analysis_status)
+        # 下载状态标志（槽函数均在GUI线程执行，无需加锁）
+        self._downloading = False
         
-        # 添加用于延迟分析的定时器
-        self.url_input_timer = QTimer()
-        self.url_input_timer.setSingleShot(True)  # 设置为单次触发
-        self.url_input_timer.timeout.connect(self._delayed_analysis)
+        # 当前下载任务
+        self._job = None
+        
+        # 调试模式下错误信息附带完整堆栈，设置环境变量YT_DD_DEBUG=1开启
+        self._debug = os.environ.get("YT_DD_DEBUG", "") not in ("", "0")
         
         # 进度相关
         self.current_progress = 0
         
+        # 进度刷新定时器：合并高频进度信号，最多每50ms刷新一次界面
+        self._pending_progress = None
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(50)
+        self._progress_timer.setSingleShot(True)
+        self._progress_timer.timeout.connect(self._flush_progress)
+        
         # 当前分析的视频信息
+        self.current_url = None
+        self._fetching_url = None  # 正在线程池中获取信息的链接
+        self._fetch_signals = None
+        self._last_analyzed_url = None
         self.current_video_formats = []
         self.current_audio_formats = []
         self.current_subtitle_langs = []
@@ -94,21 +411,8 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("yt-dd - YouTube视频下载器")
         self.setMinimumSize(900, 700)
         
-        # 设置窗口图标（添加多个尺寸）
-        window_icon = QIcon()
-        assets_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets")
-        
-        # 添加不同尺寸的图标
-        icon_sizes = {
-            "icon-32-32.ico": 32,
-            "icon-48-48.ico": 48,
-            "icon-256-256.ico": 256
-        }
-        
-        for icon_file, size in icon_sizes.items():
-            icon_path = os.path.join(assets_dir, icon_file)
-            if os.path.exists(icon_path):
-                window_icon.addFile(icon_path, size=QSize(size, size))
+        # 设置窗口图标（多尺寸图标在进程内只构建一次）
+        window_icon = _window_icon()
         
         # 强化图标设置 - 确保任务栏图标正确显示
         self.setWindowIcon(window_icon)
@@ -156,6 +460,10 @@ class MainWindow(QMainWindow):
         self.subtitle_combo = QComboBox()
         self.subtitle_combo.setPlaceholderText("选择字幕语言")
         self.subtitle_combo.setEnabled(True)  # 启用字幕选择
+        # 视频/音频按质量从高到低、字幕按语言代码排序
+        self._resolution_model = _install_sort_proxy(self.resolution_combo, Qt.SortOrder.DescendingOrder)
+        self._audio_model = _install_sort_proxy(self.audio_combo, Qt.SortOrder.DescendingOrder)
+        self._subtitle_model = _install_sort_proxy(self.subtitle_combo, Qt.SortOrder.AscendingOrder)
         format_layout.addWidget(QLabel("分辨率:"))
         format_layout.addWidget(self.resolution_combo)
         format_layout.addWidget(QLabel("音频:"))
@@ -169,6 +477,8 @@ class MainWindow(QMainWindow):
         self.save_path_input = QLineEdit()
         self.save_path_input.setReadOnly(True)
         self.save_path_input.setText(self.downloader.save_dir)
+        # 记住上次选择的目录，使目录对话框直接打开到该位置
+        self._last_browse_dir = self.downloader.save_dir
         self.browse_button = QPushButton("浏览")
         self.browse_button.setObjectName("browse_button")
         save_layout.addWidget(QLabel("保存位置:"))
@@ -179,7 +489,7 @@ class MainWindow(QMainWindow):
         # 进度显示区域
         progress_layout = QVBoxLayout()
         self.analysis_label = QLabel("就绪")
-        self.analysis_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.analysis_label.setAlignment(_ALIGN_CENTER)
         self.progress_bar = QProgressBar()
         
         # 进度条设置优化 - 使进度条更加平滑和实时
@@ -191,7 +501,7 @@ class MainWindow(QMainWindow):
         
         self.speed_label = QLabel("速度: 0 MB/s")
         self.status_label = QLabel("就绪")
-        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.status_label.setAlignment(_ALIGN_CENTER)
         progress_layout.addWidget(self.analysis_label)
         progress_layout.addWidget(self.progress_bar)
         progress_layout.addWidget(self.speed_label)
@@ -201,6 +511,8 @@ class MainWindow(QMainWindow):
         # 日志显示区域
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
+        # 限制日志行数，超出后由Qt丢弃最早的行，避免长时间运行后文档无限增长
+        self.log_text.document().setMaximumBlockCount(500)
         layout.addWidget(self.log_text)
         
         # 控制按钮区域
@@ -217,188 +529,8 @@ class MainWindow(QMainWindow):
     # 多任务下载功能已移除
 
     def _set_style(self):
-        # 设置整体样式
-        self.setStyleSheet("""
-            /* 全局样式 */
-            QMainWindow {
-                background-color: #FFFFFF;
-            }
-            
-            QWidget {
-                font-family: "Microsoft YaHei", "微软雅黑";
-                color: #333333;
-            }
-            
-            QPushButton {
-                background-color: #4361EE;
-                color: white;
-                border: none;
-                padding: 10px 24px;
-                border-radius: 6px;
-                font-size: 13px;
-                font-weight: 500;
-            }
-            
-            QPushButton:hover {
-                background-color: #3A56D4;
-            }
-            
-            QPushButton:pressed {
-                background-color: #2E4BBB;
-            }
-            
-            QPushButton:disabled {
-                background-color: #B8C0E0;
-            }
-            
-            QLineEdit {
-                border: 1px solid #E0E0E0;
-                border-radius: 6px;
-                padding: 10px 14px;
-                background: white;
-                selection-background-color: #E7EAFC;
-                font-size: 13px;
-            }
-            
-            QLineEdit:focus {
-                border: 1px solid #4361EE;
-            }
-            
-            QComboBox {
-                border: 1px solid #E0E0E0;
-                border-radius: 6px;
-                padding: 10px 14px;
-                background: white;
-                font-size: 13px;
-                min-width: 150px;
-            }
-            
-            QComboBox:focus {
-                border: 1px solid #4361EE;
-            }
-            
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-            }
-            
-            QComboBox::down-arrow {
-                image: url(down_arrow.png);
-                width: 12px;
-                height: 12px;
-            }
-            
-            QProgressBar {
-                border: none;
-                background-color: #F0F2FA;
-                height: 10px;
-                border-radius: 5px;
-                margin-top: 4px;
-                margin-bottom: 4px;
-            }
-            
-            QProgressBar::chunk {
-                background-color: #4CC9F0;
-                border-radius: 5px;
-            }
-            
-            QLabel {
-                color: #333333;
-                font-size: 13px;
-                font-weight: 400;
-            }
-            
-            QTextEdit {
-                border: 1px solid #E0E0E0;
-                border-radius: 6px;
-                padding: 10px;
-                background: white;
-                font-size: 13px;
-                line-height: 1.5;
-            }
-            
-            QTextEdit:focus {
-                border: 1px solid #4361EE;
-            }
-            
-            #status_label {
-                color: #4361EE;
-                font-weight: 600;
-                font-size: 14px;
-            }
-            
-            #speed_label {
-                color: #4CC9F0;
-                font-size: 13px;
-                font-weight: 500;
-            }
-            
-            #analysis_label {
-                color: #555555;
-                font-size: 13px;
-            }
-            
-            /* 多任务下载界面样式已移除 */
-            
-            /* 多任务按钮样式已移除 */
-            
-            /* 单任务下载界面按钮样式 */
-            #download_button {
-                background-color: #06D6A0;
-                color: white;
-                border: none;
-                padding: 10px 24px;
-                border-radius: 6px;
-                font-size: 13px;
-                font-weight: 500;
-            }
-            
-            #download_button:hover {
-                background-color: #05C190;
-            }
-            
-            #download_button:pressed {
-                background-color: #04AC80;
-            }
-            
-            #cancel_button {
-                background-color: #EF476F;
-                color: white;
-                border: none;
-                padding: 10px 24px;
-                border-radius: 6px;
-                font-size: 13px;
-                font-weight: 500;
-            }
-            
-            #cancel_button:hover {
-                background-color: #E43065;
-            }
-            
-            #cancel_button:pressed {
-                background-color: #D4205B;
-            }
-            
-            #browse_button, #multi_parse_button, #parse_button {
-                background-color: #4361EE;
-                color: white;
-                border: none;
-                padding: 10px 24px;
-                border-radius: 6px;
-                font-size: 13px;
-                font-weight: 500;
-            }
-            
-            #browse_button:hover, #multi_parse_button:hover, #parse_button:hover {
-                background-color: #3A56D4;
-            }
-            
-            #browse_button:pressed, #multi_parse_button:pressed, #parse_button:pressed {
-                background-color: #2A46C4;
-            }
-            
-            /* 多任务按钮样式选择器已移除 */
-        """)
+        # 设置整体样式（应用级样式表，所有窗口共享同一份解析结果）
+        self.theme_manager.set_custom_style("main_window", _MAIN_STYLESHEET)
 
         # 设置布局间距
         main_widget = self.centralWidget()
@@ -407,7 +539,7 @@ class MainWindow(QMainWindow):
         layout.setSpacing(15)
 
         # 设置字体
-        self.url_input.setFont(QFont("Microsoft YaHei", 13))
+        self.url_input.setFont(_ui_font())
         self.status_label.setObjectName("status_label")
         self.speed_label.setObjectName("speed_label")
         self.analysis_label.setObjectName("analysis_label")
@@ -415,78 +547,100 @@ class MainWindow(QMainWindow):
         # 多任务下载界面按钮对象名称设置已移除
 
         # 设置窗口属性
-        self.setWindowFlags(Qt.WindowType.Window | Qt.WindowType.WindowCloseButtonHint | Qt.WindowType.WindowMinimizeButtonHint)
-        
-        # 设置窗口动画
-        self.setWindowOpacity(0)
-        self.fade_in_animation = QPropertyAnimation(self, b"windowOpacity")
-        self.fade_in_animation.setDuration(300)
-        self.fade_in_animation.setStartValue(0)
-        self.fade_in_animation.setEndValue(1)
-        self.fade_in_animation.start()
+        self.setWindowFlags(_WIN_FLAGS)
 
     def _create_toolbar(self):
         """创建工具栏"""
         # 创建工具栏
         self.toolbar = QToolBar("主工具栏")
         self.toolbar.setMovable(False)
-        self.toolbar.setIconSize(QSize(24, 24))
+        self.toolbar.setIconSize(_TOOLBAR_ICON_SIZE)
         self.addToolBar(self.toolbar)
         
         # 工具栏已简化，移除了主题切换功能
         
+        # 设置按钮：鼠标悬停时在空闲时预加载设置对话框，点击时直接复用
+        self.settings_action = QAction("设置", self)
+        self.settings_action.triggered.connect(self._open_settings)
+        self.toolbar.addAction(self.settings_action)
+        self._settings_button = self.toolbar.widgetForAction(self.settings_action)
+        self._settings_button.installEventFilter(self)
+        
     # 主题切换功能已移除
     
+    def eventFilter(self, obj, event):
+        """设置按钮悬停时预加载设置对话框"""
+        if obj is getattr(self, "_settings_button", None) and event.type() in (QEvent.Type.HoverEnter, QEvent.Type.Enter):
+            obj.removeEventFilter(self)
+            QTimer.singleShot(0, lambda: SettingsDialog.preload(self))
+        return super().eventFilter(obj, event)
+    
+    def _open_settings(self):
+        """打开设置对话框"""
+        SettingsDialog.get_dialog(self).exec()
+    
     def _connect_signals(self):
         # 单任务下载界面信号连接
-        self.url_input.textChanged.connect(self._on_url_changed)
+        # 仅在编辑完成（回车/失去焦点）或点击解析按钮时分析链接
+        self.url_input.editingFinished.connect(self._delayed_analysis)
+        self.parse_button.clicked.connect(self._on_parse_clicked)
         self.browse_button.clicked.connect(self.browse_save_path)
         self.download_button.clicked.connect(self._start_download)
         self.cancel_button.clicked.connect(self._cancel_download)
         
         # 确保进度更新信号正确连接
         self.downloader.signals.progress_updated.connect(self._update_progress)
-        self.downloader.signals.info_loaded.connect(self._update_formats)
-        self.downloader.signals.error_occurred.connect(self._on_error)
+        self.downloader.signals.media_info_loaded.connect(self._update_formats)
+        self.downloader.signals.analysis_status.connect(self.analysis_label.setText)
+        self.downloader.signals.error_occurred.connect(self._on_downloader_error)
 
-    def _on_url_changed(self):
-        """处理单任务URL输入变化"""
-        # 重置并启动延时器
-        self.url_input_timer.stop()
-        self.url_input_timer.start(800)  # 800ms后触发分析
-        
-        # 更新UI状态
-        self.analysis_label.setText("准备分析...")
-        self.resolution_combo.clear()
-        self.audio_combo.clear()
-        self.subtitle_combo.clear()
+    def _on_parse_clicked(self):
+        """粘贴剪贴板中的链接并解析"""
+        text = QApplication.clipboard().text().strip()
+        if text.startswith(_URL_PREFIXES):
+            self.url_input.setText(text)
+        self._delayed_analysis()
         
     # 多任务URL输入变化处理函数已移除
 
     def _delayed_analysis(self):
-        """延迟执行单任务分析"""
+        """执行单任务分析"""
         url = self.url_input.text().strip()
-        if re.match(r'^(https?://)?(www\.)?(youtube\.com|youtu\.be)/', url):
-            self.analysis_label.setText("正在分析视频信息...")
-            self.analysis_timer.start(100)
-            self._load_media_info(url)
-        else:
+        if not _YT_URL_RE.match(url):
             self.analysis_label.setText("请输入有效的YouTube链接")
+            return
+        
+        # 该链接的信息正在获取中（如输入框失去焦点后紧接着点击解析按钮），不重复提交
+        if url == self._fetching_url:
+            return
+        
+        # 格式列表已是该链接的解析结果时保留；其他情况（包括切回之前的链接）交给缓存处理
+        if url == self.current_url and url == self._last_analyzed_url and self.resolution_combo.count():
+            self.analysis_label.setText("视频信息分析完成")
+            return
+        
+        # 分析真正开始时才清空格式列表，屏蔽信号并合并为一次重绘
+        self.single_task_tab.setUpdatesEnabled(False)
+        try:
+            with QSignalBlocker(self.resolution_combo), \
+                    QSignalBlocker(self.audio_combo), \
+                    QSignalBlocker(self.subtitle_combo):
+                self.resolution_combo.clear()
+                self.audio_combo.clear()
+                self.subtitle_combo.clear()
+        finally:
+            self.single_task_tab.setUpdatesEnabled(True)
+        # 格式列表已清空，不再对应任何已分析的链接
+        self._last_analyzed_url = None
+        
+        self._load_media_info(url)
             
     # 多任务URL解析函数已移除
 
     def _validate_url(self):
-        """URL验证已被_on_url_changed替代，保留此方法为空以兼容可能的调用"""
+        """URL验证已被_delayed_analysis替代，保留此方法为空以兼容可能的调用"""
         pass
 
-    def _check_analysis_status(self):
-        if not self.mutex.tryLock():
-            return
-        try:
-            self.analysis_label.setText("正在分析视频信息...")
-        finally:
-            self.mutex.unlock()
-
     def _load_media_info(self, url):
         try:
             self.log_text.append(f"正在解析视频信息: {url}")
@@ -494,61 +648,74 @@ class MainWindow(QMainWindow):
             # 保存当前解析的URL
             self.current_url = url
             
-            # 获取视频信息
-            self.downloader.get_media_info(url)
+            # 缓存命中时直接更新格式列表，无需再次请求
+            if self.downloader.get_cached_media_info(url):
+                return
+            
+            # 在线程池中获取视频信息，避免网络请求阻塞界面
+            fetcher = _InfoFetcher(self.downloader, url)
+            # 保留信号对象的引用，直到结束信号回到GUI线程
+            self._fetch_signals = fetcher.signals
+            fetcher.signals.finished.connect(self._on_fetch_finished)
+            self._fetching_url = url
+            QThreadPool.globalInstance().start(fetcher)
         except Exception as e:
-            error_msg = f"解析视频信息失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("解析视频信息失败", e)
             self.log_text.append(error_msg)
             QMessageBox.critical(self, "错误", error_msg)
-        finally:
-            self.analysis_timer.stop()
 
-    def _update_formats(self, video_formats, audio_formats, subtitle_langs):
+    def _on_fetch_finished(self, url):
+        """视频信息获取结束，允许再次解析该链接"""
+        if url == self._fetching_url:
+            self._fetching_url = None
+            self._fetch_signals = None
+
+    def _update_formats(self, url, video_formats, audio_formats, subtitle_langs):
+        # 丢弃已被新链接取代的旧解析结果
+        if url != self.current_url:
+            return
         try:
             # 保存当前视频信息
             self.current_video_formats = video_formats
             self.current_audio_formats = audio_formats
             self.current_subtitle_langs = subtitle_langs
+            self._last_analyzed_url = url
             
-            # 更新UI
-            self.resolution_combo.clear()
-            self.audio_combo.clear()
-            self.subtitle_combo.clear()
-            
-            # 视频格式排序
-            for fmt in sorted(video_formats, 
-                            key=lambda x: int(x['desc'].split('p')[0]), 
-                            reverse=True):
-                self.resolution_combo.addItem(fmt['desc'], fmt['id'])
+            # 更新UI（排序由下拉框的代理模型完成）
+            _bulk_fill(self.resolution_combo, self._resolution_model,
+                       ((fmt['desc'], fmt['id'], fmt['sort_key']) for fmt in video_formats))
+            _bulk_fill(self.audio_combo, self._audio_model,
+                       ((fmt['desc'], fmt['id'], fmt['sort_key']) for fmt in audio_formats))
             
-            # 音频格式排序
-            for fmt in sorted(audio_formats, 
-                            key=lambda x: float(x['desc'].split('k')[0]), 
-                            reverse=True):
-                self.audio_combo.addItem(fmt['desc'], fmt['id'])
-            
-            # 添加字幕选项
-            self.subtitle_combo.addItem("无字幕", None)
-            for sub in subtitle_langs:
-                self.subtitle_combo.addItem(sub['name'], sub['code'])
+            # 添加字幕选项（"无字幕"排序键为空字符串，始终排在首位）
+            _bulk_fill(self.subtitle_combo, self._subtitle_model,
+                       [("无字幕", None, "")] + [(sub['name'], sub['code'], sub['code']) for sub in subtitle_langs])
                 
             self.analysis_label.setText("视频信息分析完成")
             self.log_text.append("视频信息分析完成")
                 
         except Exception as e:
-            error_msg = f"更新格式列表失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("更新格式列表失败", e)
             self.log_text.append(error_msg)
             QMessageBox.critical(self, "错误", error_msg)
 
+    def _error_message(self, prefix, e):
+        """生成错误信息，完整堆栈写入日志文件，界面仅在调试模式下显示堆栈"""
+        log.exception(f"{prefix}: {str(e)}")
+        if self._debug:
+            return f"{prefix}: {str(e)}\n{_get_tb().format_exc()}"
+        return f"{prefix}: {str(e)}"
+
     def browse_save_path(self):
         try:
-            directory = QFileDialog.getExistingDirectory(self, "选择保存目录")
+            directory = QFileDialog.getExistingDirectory(self, "选择保存目录", self._last_browse_dir)
             if directory:
+                self._last_browse_dir = directory
                 self.save_path_input.setText(directory)
                 self.downloader.save_dir = directory
                 self.log_text.append(f"保存目录已设置为: {directory}")
         except Exception as e:
-            error_msg = f"选择保存目录失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("选择保存目录失败", e)
             self.log_text.append(error_msg)
             QMessageBox.critical(self, "错误", error_msg)
             
@@ -556,80 +723,89 @@ class MainWindow(QMainWindow):
 
     def _start_download(self):
         """开始下载"""
+        if self._downloading:
+            return
         try:
-            if self.mutex.tryLock():
-                url = self.url_input.text().strip()
-                if not url:
-                    QMessageBox.critical(self, "错误", "请输入有效链接")
-                    self.mutex.unlock()
-                    return
-                
-                video_fmt = self.resolution_combo.currentData()
-                audio_fmt = self.audio_combo.currentData()
-                subtitle_lang = self.subtitle_combo.currentData()
-                
-                if not video_fmt or not audio_fmt:
-                    QMessageBox.critical(self, "错误", "请选择视频和音频格式")
-                    self.mutex.unlock()
-                    return
-                
-                # 重置进度条和状态
-                self.progress_bar.setValue(0)
-                self.status_label.setText("准备下载...")
-                self.speed_label.setText("下载速度: 0.00 MB/s")
-                self.log_text.append(f"开始下载: {url}")
-                
-                # 禁用相关按钮
-                self.download_button.setEnabled(False)
-                self.cancel_button.setEnabled(True)
-                self.url_input.setEnabled(False)
-                self.resolution_combo.setEnabled(False)
-                self.audio_combo.setEnabled(False)
-                self.subtitle_combo.setEnabled(False)
-                
-                # 启动下载线程
-                self.thread = DownloadThread(self.downloader, url, video_fmt, audio_fmt, subtitle_lang)
-                self.thread.finished.connect(self._on_download_complete)
-                self.thread.error.connect(self._on_error)
-                self.thread.start()
+            url = self.url_input.text().strip()
+            if not url:
+                QMessageBox.critical(self, "错误", "请输入有效链接")
+                return
+            
+            video_fmt = self.resolution_combo.currentData()
+            audio_fmt = self.audio_combo.currentData()
+            subtitle_lang = self.subtitle_combo.currentData()
+            
+            if not video_fmt or not audio_fmt:
+                QMessageBox.critical(self, "错误", "请选择视频和音频格式")
+                return
+            
+            self._downloading = True
+            
+            # 重置进度条和状态
+            self.progress_bar.setValue(0)
+            self.status_label.setText("准备下载...")
+            self.speed_label.setText("下载速度: 0.00 MB/s")
+            self.log_text.append(f"开始下载: {url}")
+            
+            # 禁用相关按钮
+            self.download_button.setEnabled(False)
+            self.cancel_button.setEnabled(True)
+            self.url_input.setEnabled(False)
+            self.parse_button.setEnabled(False)
+            self.resolution_combo.setEnabled(False)
+            self.audio_combo.setEnabled(False)
+            self.subtitle_combo.setEnabled(False)
+            
+            # 提交到全局线程池执行
+            self._job = DownloadJob(self.downloader, url, video_fmt, audio_fmt, subtitle_lang)
+            self._job.signals.finished.connect(self._on_download_complete)
+            self._job.signals.error.connect(self._on_error)
+            QThreadPool.globalInstance().start(self._job)
                 
         except Exception as e:
-            error_msg = f"启动下载失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("启动下载失败", e)
             self.log_text.append(error_msg)
             QMessageBox.critical(self, "错误", error_msg)
-            self.mutex.unlock()
+            self._downloading = False
 
-    def _update_progress(self, percent, speed):
-        """更新下载进度和速度 - 直接显示实时进度"""
-        try:
-            # 直接设置进度条值
-            self.progress_bar.setValue(int(percent))
-            self.current_progress = int(percent)
-            
-            # 更新速度标签
-            self.speed_label.setText(f"下载速度: {speed}")
-            
-            # 更新状态标签
-            if percent < 100:
-                if speed == "准备下载...":
-                    self.status_label.setText("准备下载...")
-                elif speed == "处理中...":
-                    self.status_label.setText("处理中...")
-                else:
-                    self.status_label.setText(f"正在下载: {percent:.1f}%")
+    def _update_progress(self, percent, speed_bps, state):
+        """缓存最新进度，由定时器合并刷新到界面"""
+        self._pending_progress = (percent, speed_bps, state)
+        if not self._progress_timer.isActive():
+            self._progress_timer.start()
+
+    def _flush_progress(self):
+        """将缓存的最新进度刷新到界面"""
+        if self._pending_progress is None:
+            return
+        percent, speed_bps, state = self._pending_progress
+        self._pending_progress = None
+        
+        # 直接设置进度条值
+        self.progress_bar.setValue(int(percent))
+        self.current_progress = int(percent)
+        
+        # 更新速度标签
+        self.speed_label.setText(_SPEED_FMT(speed_bps / 1048576))
+        
+        # 更新状态标签
+        if percent < 100:
+            if state == STATE_PREPARING:
+                self.status_label.setText("准备下载...")
+            elif state == STATE_PROCESSING:
+                self.status_label.setText("处理中...")
             else:
-                self.status_label.setText("下载完成")
-            
-            # 确保UI即时更新
-            QApplication.processEvents()
-            
-        except Exception as e:
-            error_msg = f"更新进度失败: {str(e)}\n{traceback.format_exc()}"
-            self.log_text.append(error_msg)
+                self.status_label.setText(_PCT_FMT(percent))
+        else:
+            self.status_label.setText("下载完成")
 
     def _on_download_complete(self, msg):
         """下载完成处理"""
         try:
+            # 丢弃尚未刷新的进度，避免覆盖完成状态
+            self._progress_timer.stop()
+            self._pending_progress = None
+            
             # 确保进度条显示100%
             self.progress_bar.setValue(100)
             self.current_progress = 100
@@ -638,6 +814,7 @@ class MainWindow(QMainWindow):
             self.download_button.setEnabled(True)
             self.cancel_button.setEnabled(False)
             self.url_input.setEnabled(True)
+            self.parse_button.setEnabled(True)
             self.resolution_combo.setEnabled(True)
             self.audio_combo.setEnabled(True)
             self.subtitle_combo.setEnabled(True)
@@ -648,20 +825,25 @@ class MainWindow(QMainWindow):
             # 添加下载完成的日志记录
             self.log_text.append(msg)
             
-            # 解锁互斥锁
-            self.mutex.unlock()
+            # 重置下载状态
+            self._downloading = False
             
         except Exception as e:
-            error_msg = f"处理完成消息失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("处理完成消息失败", e)
             self.log_text.append(error_msg)
 
     def _on_error(self, msg):
         """错误处理"""
         try:
+            # 丢弃尚未刷新的进度，避免覆盖错误状态
+            self._progress_timer.stop()
+            self._pending_progress = None
+            
             # 恢复按钮状态
             self.download_button.setEnabled(True)
             self.cancel_button.setEnabled(False)
             self.url_input.setEnabled(True)
+            self.parse_button.setEnabled(True)
             self.resolution_combo.setEnabled(True)
             self.audio_combo.setEnabled(True)
             self.subtitle_combo.setEnabled(True)
@@ -676,28 +858,35 @@ class MainWindow(QMainWindow):
                 self.status_label.setText("下载已取消")
                 self.log_text.append("下载已取消")
             
-            # 解锁互斥锁
-            self.mutex.unlock()
+            # 重置下载状态
+            self._downloading = False
             
         except Exception as e:
-            error_msg = f"处理错误消息失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("处理错误消息失败", e)
             self.log_text.append(error_msg)
             
+    def _on_downloader_error(self, msg):
+        """下载器错误处理：下载进行中只记录日志，由下载线程的结果信号统一恢复状态"""
+        if self._downloading:
+            self.log_text.append(f"错误: {msg}")
+            return
+        self._on_error(msg)
+            
     # 多任务下载相关事件处理函数已移除
 
     def _cancel_download(self):
         """取消单任务下载"""
         try:
-            if hasattr(self, 'thread') and self.thread.isRunning():
+            if self._downloading and self._job is not None:
                 # 在日志中显示取消消息
                 self.log_text.append("正在取消下载...")
-                # 调用线程的取消方法
-                self.thread.cancel()
+                # 调用任务的取消方法
+                self._job.cancel()
                 # 更新UI状态
                 self.status_label.setText("正在取消...")
                 self.cancel_button.setEnabled(False)
         except Exception as e:
-            error_msg = f"取消下载失败: {str(e)}\n{traceback.format_exc()}"
+            error_msg = self._error_message("取消下载失败", e)
             self.log_text.append(error_msg)
             
-    # 多任务下载相关操作函数已移除
\ No newline at end of file
+    # 多任务下载相关操作函数已移除
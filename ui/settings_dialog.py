@@ -1,23 +1,74 @@
-import os
-import json
 from typing import Dict, Any, Optional
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget, QLabel,
     QLineEdit, QComboBox, QCheckBox, QPushButton, QFileDialog,
     QSpinBox, QGroupBox, QFormLayout, QMessageBox, QSlider
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QSettings
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import Qt, pyqtSignal, QSettings, QObject, QRunnable, QThreadPool
+from PyQt6.QtGui import QIcon, QColor, QPixmap, QPixmapCache
 
-from core.config_manager import ConfigManager
+from core.config_manager import ConfigManager, load_default_config
 from ui.theme_manager import get_theme_manager
 
+# 主题色块图标尺寸
+_SWATCH_SIZE = 32
+
+def _theme_swatch(theme_id: str, theme_data: Dict[str, Any]) -> QIcon:
+    """获取主题色块图标，渲染结果保存在全局QPixmapCache中"""
+    color = theme_data["colors"]["highlight"]
+    key = f"theme_swatch_{theme_id}_{color}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is None:
+        pixmap = QPixmap(_SWATCH_SIZE, _SWATCH_SIZE)
+        pixmap.fill(QColor(color))
+        QPixmapCache.insert(key, pixmap)
+    return QIcon(pixmap)
+
+class _ResetWorkerSignals(QObject):
+    """重置任务信号类（QRunnable本身不能定义信号）"""
+    # 读取完成信号，参数为默认配置字典，读取失败时为None
+    finished = pyqtSignal(object)
+
+class _ResetWorker(QRunnable):
+    """在线程池中读取默认配置，避免重置时阻塞界面"""
+    
+    def __init__(self):
+        super().__init__()
+        self.signals = _ResetWorkerSignals()
+    
+    def run(self):
+        try:
+            default_config = load_default_config()
+        except Exception as e:
+            print(f"读取默认配置失败: {e}")
+            default_config = None
+        self.signals.finished.emit(default_config)
+
 class SettingsDialog(QDialog):
     """设置对话框，用于配置应用程序的各种设置"""
     
     # 设置更改信号
     settings_changed = pyqtSignal(dict)
     
+    # 预加载的对话框实例
+    _cached = None
+    
+    @classmethod
+    def preload(cls, parent=None) -> None:
+        """预先构建对话框并保持隐藏，供随后打开时直接复用"""
+        if cls._cached is None:
+            cls._cached = cls(parent)
+            cls._cached.hide()
+    
+    @classmethod
+    def get_dialog(cls, parent=None) -> 'SettingsDialog':
+        """获取设置对话框，优先复用预加载实例并刷新为当前设置"""
+        if cls._cached is None:
+            cls.preload(parent)
+        else:
+            cls._cached._load_settings()
+        return cls._cached
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.config_manager = ConfigManager()
@@ -40,17 +91,22 @@ class SettingsDialog(QDialog):
         # 创建选项卡
         self.tab_widget = QTabWidget()
         
-        # 创建各个选项卡页面
-        self.general_tab = self._create_general_tab()
-        self.download_tab = self._create_download_tab()
-        self.appearance_tab = self._create_appearance_tab()
-        self.network_tab = self._create_network_tab()
+        # 选项卡按需构建：索引 -> (标题, 构建函数, 加载设置函数, 收集设置函数)
+        self._tab_builders = {
+            0: ("常规", self._create_general_tab, self._load_general_settings, self._collect_general_settings),
+            1: ("下载", self._create_download_tab, self._load_download_settings, self._collect_download_settings),
+            2: ("外观", self._create_appearance_tab, self._load_appearance_settings, self._collect_appearance_settings),
+            3: ("网络", self._create_network_tab, self._load_network_settings, self._collect_network_settings),
+        }
+        self._tab_built = set()
+        
+        # 先添加占位页面，首次切换到某个选项卡时再构建其控件
+        for index in sorted(self._tab_builders):
+            self.tab_widget.addTab(QWidget(), self._tab_builders[index][0])
         
-        # 添加选项卡
-        self.tab_widget.addTab(self.general_tab, "常规")
-        self.tab_widget.addTab(self.download_tab, "下载")
-        self.tab_widget.addTab(self.appearance_tab, "外观")
-        self.tab_widget.addTab(self.network_tab, "网络")
+        # 立即构建第一个选项卡，保证对话框打开时有内容
+        self._build_tab(0)
+        self.tab_widget.currentChanged.connect(self._ensure_tab_built)
         
         # 添加到主布局
         main_layout.addWidget(self.tab_widget)
@@ -80,6 +136,31 @@ class SettingsDialog(QDialog):
         self.cancel_button.clicked.connect(self.reject)
         self.save_button.clicked.connect(self._save_settings)
     
+    def _build_tab(self, index: int) -> None:
+        """构建指定选项卡并替换占位页面"""
+        title, builder, _, _ = self._tab_builders[index]
+        tab = builder()
+        self._tab_built.add(index)
+        
+        # 替换占位页面时屏蔽信号，避免removeTab切换当前页触发其他选项卡构建
+        self.tab_widget.blockSignals(True)
+        try:
+            current = self.tab_widget.currentIndex()
+            placeholder = self.tab_widget.widget(index)
+            self.tab_widget.removeTab(index)
+            self.tab_widget.insertTab(index, tab, title)
+            self.tab_widget.setCurrentIndex(current)
+            placeholder.deleteLater()
+        finally:
+            self.tab_widget.blockSignals(False)
+    
+    def _ensure_tab_built(self, index: int) -> None:
+        """选项卡切换处理，首次显示时构建控件并加载对应设置"""
+        if index < 0 or index in self._tab_built:
+            return
+        self._build_tab(index)
+        self._tab_builders[index][2](self.config_manager.snapshot())
+    
     def _create_general_tab(self) -> QWidget:
         """创建常规选项卡"""
         tab = QWidget()
@@ -126,17 +207,28 @@ class SettingsDialog(QDialog):
         
         # 默认视频质量
         self.video_quality_combo = QComboBox()
-        self.video_quality_combo.addItems(["最佳", "1080p", "720p", "480p", "360p"])
+        video_qualities = ["最佳", "1080p", "720p", "480p", "360p"]
+        self.video_quality_combo.addItems(video_qualities)
+        self._video_quality_index = {text: i for i, text in enumerate(video_qualities)}
         format_layout.addRow("默认视频质量:", self.video_quality_combo)
         
         # 默认音频质量
         self.audio_quality_combo = QComboBox()
-        self.audio_quality_combo.addItems(["最佳", "高", "中", "低"])
+        audio_qualities = [("最佳", "best"), ("高", "high"), ("中", "medium"), ("低", "low")]
+        self._audio_quality_index = {}
+        for i, (label, code) in enumerate(audio_qualities):
+            self.audio_quality_combo.addItem(label, code)
+            # 同时记录代码和标签，兼容旧版本保存的中文标签
+            self._audio_quality_index[code] = i
+            self._audio_quality_index[label] = i
         format_layout.addRow("默认音频质量:", self.audio_quality_combo)
         
         # 默认字幕语言
         self.subtitle_lang_combo = QComboBox()
-        self.subtitle_lang_combo.addItems(["中文", "英文", "自动", "无"])
+        subtitle_langs = [("中文", "zh"), ("英文", "en"), ("自动", "auto"), ("无", "none")]
+        for label, code in subtitle_langs:
+            self.subtitle_lang_combo.addItem(label, code)
+        self._subtitle_lang_index = {code: i for i, (_, code) in enumerate(subtitle_langs)}
         format_layout.addRow("默认字幕语言:", self.subtitle_lang_combo)
         
         # 添加格式组到主布局
@@ -181,9 +273,14 @@ class SettingsDialog(QDialog):
         
         # 主题选择
         self.theme_combo = QComboBox()
-        themes = self.theme_manager.get_available_themes()
-        for theme_id, theme_name in themes.items():
-            self.theme_combo.addItem(theme_name, theme_id)
+        self._theme_index = {}
+        for theme_id, theme_name in self.theme_manager.get_available_themes_items():
+            self._theme_index[theme_id] = self.theme_combo.count()
+            self.theme_combo.addItem(
+                _theme_swatch(theme_id, self.theme_manager.themes[theme_id]), theme_name, theme_id
+            )
+        # 后台扫描到的主题随后追加
+        self.theme_manager.signals.theme_loaded.connect(self._on_theme_loaded)
         theme_layout.addRow("主题:", self.theme_combo)
         
         # 添加主题组到主布局
@@ -252,8 +349,8 @@ class SettingsDialog(QDialog):
         # 连接信号
         self.proxy_enabled_check.toggled.connect(self._on_proxy_enabled_changed)
         
-        # 初始禁用代理设置
-        self._on_proxy_enabled_changed(False)
+        # 代理控件的启用状态，由_load_network_settings按保存的配置设置
+        self._last_proxy_enabled = None
         
         # 添加伸缩项
         layout.addStretch()
@@ -271,59 +368,75 @@ class SettingsDialog(QDialog):
         theme_id = self.theme_combo.currentData()
         # 这里可以添加主题预览功能
     
+    def _on_theme_loaded(self, theme_id: str, theme_data: Dict[str, Any]):
+        """后台加载的主题添加到主题列表"""
+        index = self._theme_index.get(theme_id)
+        if index is None:
+            self._theme_index[theme_id] = self.theme_combo.count()
+            self.theme_combo.addItem(_theme_swatch(theme_id, theme_data), theme_data["name"], theme_id)
+        else:
+            self.theme_combo.setItemText(index, theme_data["name"])
+            self.theme_combo.setItemIcon(index, _theme_swatch(theme_id, theme_data))
+    
     def _on_font_size_changed(self, value):
         """字体大小更改处理"""
         self.font_size_label.setText(str(value))
     
     def _on_proxy_enabled_changed(self, enabled):
         """代理启用状态更改处理"""
+        if enabled == self._last_proxy_enabled:
+            return
+        self._last_proxy_enabled = enabled
         self.proxy_type_combo.setEnabled(enabled)
         self.proxy_host_edit.setEnabled(enabled)
         self.proxy_port_edit.setEnabled(enabled)
     
     def _load_settings(self):
-        """加载当前设置"""
-        # 常规设置
-        self.download_path_edit.setText(self.config_manager.get("download_path", ""))
-        self.auto_update_check.setChecked(self.config_manager.get("auto_check_update", True))
-        self.auto_open_folder_check.setChecked(self.config_manager.get("auto_open_folder", True))
-        
-        # 下载设置
-        video_quality = self.config_manager.get("default_video_quality", "1080p")
-        index = self.video_quality_combo.findText(video_quality)
+        """加载当前设置（仅加载已构建的选项卡）"""
+        cfg = self.config_manager.snapshot()
+        for index in sorted(self._tab_built):
+            self._tab_builders[index][2](cfg)
+    
+    def _load_general_settings(self, cfg: Dict[str, Any]):
+        """加载常规设置"""
+        self.download_path_edit.setText(cfg.get("download_path", ""))
+        self.auto_update_check.setChecked(cfg.get("auto_check_update", True))
+        self.auto_open_folder_check.setChecked(cfg.get("auto_open_folder", True))
+    
+    def _load_download_settings(self, cfg: Dict[str, Any]):
+        """加载下载设置"""
+        video_quality = cfg.get("default_video_quality", "1080p")
+        index = self._video_quality_index.get(video_quality, -1)
         if index >= 0:
             self.video_quality_combo.setCurrentIndex(index)
         
-        audio_quality = self.config_manager.get("default_audio_quality", "best")
-        index = self.audio_quality_combo.findText(audio_quality)
+        audio_quality = cfg.get("default_audio_quality", "best")
+        index = self._audio_quality_index.get(audio_quality, -1)
         if index >= 0:
             self.audio_quality_combo.setCurrentIndex(index)
         
-        subtitle_lang = self.config_manager.get("default_subtitle_lang", "zh")
-        if subtitle_lang == "zh":
-            self.subtitle_lang_combo.setCurrentText("中文")
-        elif subtitle_lang == "en":
-            self.subtitle_lang_combo.setCurrentText("英文")
-        elif subtitle_lang == "auto":
-            self.subtitle_lang_combo.setCurrentText("自动")
-        else:
-            self.subtitle_lang_combo.setCurrentText("无")
-        
-        self.max_concurrent_spin.setValue(self.config_manager.get("max_concurrent_downloads", 2))
-        self.retry_spin.setValue(self.config_manager.get("retry_count", 3))
-        self.use_aria2c_check.setChecked(self.config_manager.get("use_aria2c", True))
-        
-        # 外观设置
-        theme = self.config_manager.get("theme", "light")
-        for i in range(self.theme_combo.count()):
-            if self.theme_combo.itemData(i) == theme:
-                self.theme_combo.setCurrentIndex(i)
-                break
+        subtitle_lang = cfg.get("default_subtitle_lang", "zh")
+        # 未知语言代码按"无"处理
+        self.subtitle_lang_combo.setCurrentIndex(
+            self._subtitle_lang_index.get(subtitle_lang, self._subtitle_lang_index["none"])
+        )
         
-        self.font_size_slider.setValue(self.config_manager.get("font_size", 10))
+        self.max_concurrent_spin.setValue(cfg.get("max_concurrent_downloads", 2))
+        self.retry_spin.setValue(cfg.get("retry_count", 3))
+        self.use_aria2c_check.setChecked(cfg.get("use_aria2c", True))
+    
+    def _load_appearance_settings(self, cfg: Dict[str, Any]):
+        """加载外观设置"""
+        theme = cfg.get("theme", "light")
+        index = self._theme_index.get(theme, -1)
+        if index >= 0:
+            self.theme_combo.setCurrentIndex(index)
         
-        # 网络设置
-        proxy = self.config_manager.get("proxy", {})
+        self.font_size_slider.setValue(cfg.get("font_size", 10))
+    
+    def _load_network_settings(self, cfg: Dict[str, Any]):
+        """加载网络设置"""
+        proxy = cfg.get("proxy", {})
         self.proxy_enabled_check.setChecked(proxy.get("enabled", False))
         self.proxy_type_combo.setCurrentText(proxy.get("type", "HTTP").upper())
         self.proxy_host_edit.setText(proxy.get("host", ""))
@@ -332,51 +445,49 @@ class SettingsDialog(QDialog):
         # 更新UI状态
         self._on_proxy_enabled_changed(self.proxy_enabled_check.isChecked())
     
-    def _save_settings(self):
-        """保存设置"""
-        # 收集设置
-        settings = {}
-        
-        # 常规设置
+    def _collect_general_settings(self, settings: Dict[str, Any]):
+        """收集常规设置"""
         settings["download_path"] = self.download_path_edit.text()
         settings["auto_check_update"] = self.auto_update_check.isChecked()
         settings["auto_open_folder"] = self.auto_open_folder_check.isChecked()
-        
-        # 下载设置
+    
+    def _collect_download_settings(self, settings: Dict[str, Any]):
+        """收集下载设置"""
         settings["default_video_quality"] = self.video_quality_combo.currentText()
-        settings["default_audio_quality"] = self.audio_quality_combo.currentText().lower()
-        
-        subtitle_text = self.subtitle_lang_combo.currentText()
-        if subtitle_text == "中文":
-            settings["default_subtitle_lang"] = "zh"
-        elif subtitle_text == "英文":
-            settings["default_subtitle_lang"] = "en"
-        elif subtitle_text == "自动":
-            settings["default_subtitle_lang"] = "auto"
-        else:
-            settings["default_subtitle_lang"] = "none"
+        settings["default_audio_quality"] = self.audio_quality_combo.currentData()
+        settings["default_subtitle_lang"] = self.subtitle_lang_combo.currentData()
         
         settings["max_concurrent_downloads"] = self.max_concurrent_spin.value()
         settings["retry_count"] = self.retry_spin.value()
         settings["use_aria2c"] = self.use_aria2c_check.isChecked()
-        
-        # 外观设置
+    
+    def _collect_appearance_settings(self, settings: Dict[str, Any]):
+        """收集外观设置"""
         settings["theme"] = self.theme_combo.currentData()
         settings["font_size"] = self.font_size_slider.value()
-        
-        # 网络设置
+    
+    def _collect_network_settings(self, settings: Dict[str, Any]):
+        """收集网络设置"""
         settings["proxy"] = {
             "enabled": self.proxy_enabled_check.isChecked(),
             "type": self.proxy_type_combo.currentText().lower(),
             "host": self.proxy_host_edit.text(),
             "port": self.proxy_port_edit.text()
         }
+    
+    def _save_settings(self):
+        """保存设置"""
+        # 收集设置（未打开过的选项卡没有改动，保留原配置）
+        settings = {}
+        for index in sorted(self._tab_built):
+            self._tab_builders[index][3](settings)
         
         # 保存设置
         self.config_manager.update(settings)
         
-        # 应用主题
-        self.theme_manager.apply_theme(settings["theme"])
+        # 主题有变化时才重新应用
+        if "theme" in settings and settings["theme"] != self.theme_manager.get_current_theme():
+            self.theme_manager.apply_theme(settings["theme"])
         
         # 发送设置更改信号
         self.settings_changed.emit(settings)
@@ -393,16 +504,20 @@ class SettingsDialog(QDialog):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            # 重置为默认配置
-            default_config_file = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)),
-                "config", "default_config.json"
-            )
-            
-            if os.path.exists(default_config_file):
-                with open(default_config_file, 'r', encoding='utf-8') as f:
-                    default_config = json.load(f)
-                    self.config_manager.update(default_config)
-            
-            # 重新加载设置
-            self._load_settings()
\ No newline at end of file
+            # 在后台读取默认配置，完成前禁用重置按钮
+            self.reset_button.setEnabled(False)
+            worker = _ResetWorker()
+            # 保留信号对象的引用，直到结果回到GUI线程
+            self._reset_signals = worker.signals
+            worker.signals.finished.connect(self._on_reset_loaded)
+            QThreadPool.globalInstance().start(worker)
+    
+    def _on_reset_loaded(self, default_config: Optional[Dict[str, Any]]):
+        """默认配置读取完成，重置为默认配置"""
+        self._reset_signals = None
+        if default_config is not None:
+            self.config_manager.update(default_config)
+        
+        # 重新加载设置
+        self._load_settings()
+        self.reset_button.setEnabled(True)
\ No newline at end of file
@@ -1,15 +1,71 @@
 import os
 import json
-from typing import Dict, Any, Optional
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QPalette, QColor
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 主题索引缓存，按 (mtime, size) 记录已验证主题文件的解析结果
+THEME_INDEX_PATH = Path.home() / ".cache" / "yt-dd" / "themes.index.json"
+
+def _theme_id_for(abs_path: str, theme_data: Dict[str, Any]) -> str:
+    """获取主题ID，未指定时使用文件名"""
+    return theme_data.get("id") or Path(abs_path).stem
+
+class ThemeSignals(QObject):
+    """主题管理器信号"""
+    # 主题加载完成信号 (主题ID, 主题数据)
+    theme_loaded = pyqtSignal(str, object)
+
+class _ThemeScanWorker(QRunnable):
+    """在线程池中扫描主题目录并加载其中的主题文件"""
+    
+    def __init__(self, manager: 'ThemeManager', dir_path: str):
+        super().__init__()
+        self.manager = manager
+        self.dir_path = dir_path
+    
+    def run(self):
+        try:
+            with os.scandir(self.dir_path) as it:
+                entries = [entry for entry in it if entry.name.endswith(".json") and entry.is_file()]
+        except OSError:
+            return
+        
+        for entry in entries:
+            abs_path = os.path.abspath(entry.path)
+            try:
+                theme_data = self.manager._read_theme_file(abs_path, entry.stat())
+            except Exception as e:
+                print(f"加载主题文件失败: {abs_path}: {str(e)}")
+                continue
+            if theme_data is not None:
+                # 跨线程发射，由主线程注册主题
+                self.manager.signals.theme_loaded.emit(_theme_id_for(abs_path, theme_data), theme_data)
+        
+        self.manager._flush_theme_index()
 
 class ThemeManager:
     """主题管理器，用于管理应用程序的主题和样式"""
     
-    # 预定义主题 - 只保留现代白色主题
-    THEMES = {
+    __slots__ = (
+        "app", "current_theme", "custom_styles", "themes", "signals", "_available_themes_cache",
+        "_palette_cache", "_applied", "_applied_styles", "_styles_dirty",
+        "_theme_index", "_invalid_files", "_theme_index_dirty", "_theme_index_lock",
+        "__weakref__",
+    )
+    
+    # 预定义主题（只读） - 只保留现代白色主题
+    THEMES = MappingProxyType({
         "light": {
             "name": "浅色主题",
             "style": "Fusion",
@@ -31,7 +87,45 @@ class ThemeManager:
                 "shadow": "#BDBDBD"
             }
         }
-    }
+    })
+    
+    # 调色板角色与主题颜色键的对应关系
+    _ROLE_KEY_PAIRS = (
+        (QPalette.ColorRole.Window, "window"),
+        (QPalette.ColorRole.WindowText, "window_text"),
+        (QPalette.ColorRole.Base, "base"),
+        (QPalette.ColorRole.AlternateBase, "alternate_base"),
+        (QPalette.ColorRole.Text, "text"),
+        (QPalette.ColorRole.Button, "button"),
+        (QPalette.ColorRole.ButtonText, "button_text"),
+        (QPalette.ColorRole.BrightText, "bright_text"),
+        (QPalette.ColorRole.Highlight, "highlight"),
+        (QPalette.ColorRole.HighlightedText, "highlight_text"),
+        (QPalette.ColorRole.Link, "link"),
+        (QPalette.ColorRole.Dark, "dark"),
+        (QPalette.ColorRole.Mid, "mid"),
+        (QPalette.ColorRole.Midlight, "mid_light"),
+        (QPalette.ColorRole.Shadow, "shadow"),
+    )
+    
+    # 主题数据必需的键
+    _REQ_TOP = frozenset({"name", "style", "colors"})
+    _REQ_COLORS = frozenset({
+        "window", "window_text", "base", "alternate_base", "text",
+        "button", "button_text", "bright_text", "highlight",
+        "highlight_text", "link", "dark", "mid", "mid_light", "shadow"
+    })
+    
+    # 基础样式表，与自定义样式拼接后应用到整个应用程序
+    _BASE_STYLESHEET = """
+            QToolTip {
+                border: 1px solid #E0E0E0;
+                background-color: #FFFFFF;
+                color: #333333;
+                padding: 8px;
+                border-radius: 4px;
+            }
+        """
     
     # 单例实例
     _instance = None
@@ -47,7 +141,29 @@ class ThemeManager:
         """初始化主题管理器"""
         self.app = QApplication.instance()
         self.current_theme = "light"  # 默认主题
+        # 可用主题，包括预定义主题和从文件加载的主题
+        self.themes: Dict[str, Dict[str, Any]] = dict(self.THEMES)
+        # (主题ID, 主题名称) 列表缓存，注册新主题时失效
+        self._available_themes_cache: Optional[Tuple[Tuple[str, str], ...]] = None
         self.custom_styles = {}
+        # 每个主题只构建一次调色板
+        self._palette_cache: Dict[str, QPalette] = {}
+        # 主题是否已至少应用过一次
+        self._applied = False
+        # 上次应用的自定义样式片段，用于跳过相同内容的重复解析
+        self._applied_styles = None
+        # 是否有待应用的自定义样式
+        self._styles_dirty = False
+        # 主题索引缓存，首次使用时从磁盘加载
+        self._theme_index: Optional[Dict[str, Any]] = None
+        # 验证失败的主题文件 (绝对路径 -> mtime)，文件未修改时不再重新解析
+        self._invalid_files: Dict[str, float] = {}
+        self._theme_index_dirty = False
+        self._theme_index_lock = threading.Lock()
+        
+        # 主题加载信号，先连接注册函数，保证其他接收者收到时主题已可用
+        self.signals = ThemeSignals()
+        self.signals.theme_loaded.connect(self._register_theme)
         
         # 确保应用程序实例存在
         if not self.app:
@@ -64,37 +180,25 @@ class ThemeManager:
         """
         # 忽略传入的主题名称，始终使用白色主题
         theme_name = "light"
-        theme = self.THEMES[theme_name]
+        
+        # 主题未变化时跳过，避免整个应用程序重新polish；
+        # 但仍立即应用排队中的自定义样式，保证窗口显示前样式表已生效
+        if theme_name == self.current_theme and self._applied:
+            if self._styles_dirty:
+                self.apply_custom_styles()
+            return True
+        
+        theme = self.themes[theme_name]
         self.current_theme = theme_name
         
         # 设置应用程序样式
         self.app.setStyle(theme["style"])
         
-        # 创建调色板
-        palette = QPalette()
-        colors = theme["colors"]
-        
-        # 设置调色板颜色
-        color_roles = {
-            QPalette.ColorRole.Window: colors["window"],
-            QPalette.ColorRole.WindowText: colors["window_text"],
-            QPalette.ColorRole.Base: colors["base"],
-            QPalette.ColorRole.AlternateBase: colors["alternate_base"],
-            QPalette.ColorRole.Text: colors["text"],
-            QPalette.ColorRole.Button: colors["button"],
-            QPalette.ColorRole.ButtonText: colors["button_text"],
-            QPalette.ColorRole.BrightText: colors["bright_text"],
-            QPalette.ColorRole.Highlight: colors["highlight"],
-            QPalette.ColorRole.HighlightedText: colors["highlight_text"],
-            QPalette.ColorRole.Link: colors["link"],
-            QPalette.ColorRole.Dark: colors["dark"],
-            QPalette.ColorRole.Mid: colors["mid"],
-            QPalette.ColorRole.Midlight: colors["mid_light"],
-            QPalette.ColorRole.Shadow: colors["shadow"]
-        }
-        
-        for role, color in color_roles.items():
-            palette.setColor(role, QColor(color))
+        # 获取调色板，首次使用时构建并缓存
+        palette = self._palette_cache.get(theme_name)
+        if palette is None:
+            palette = self._build_palette(theme["colors"])
+            self._palette_cache[theme_name] = palette
         
         # 应用调色板
         self.app.setPalette(palette)
@@ -102,8 +206,23 @@ class ThemeManager:
         # 应用自定义样式表
         self.apply_custom_styles()
         
+        self._applied = True
         return True
     
+    def _build_palette(self, colors: Dict[str, str]) -> QPalette:
+        """根据主题颜色构建调色板
+        
+        Args:
+            colors: 颜色键到十六进制颜色字符串的映射
+            
+        Returns:
+            QPalette: 构建好的调色板
+        """
+        palette = QPalette()
+        for role, key in self._ROLE_KEY_PAIRS:
+            palette.setColor(role, QColor(colors[key]))
+        return palette
+    
     def get_current_theme(self) -> str:
         """获取当前主题名称"""
         return self.current_theme
@@ -114,7 +233,19 @@ class ThemeManager:
         Returns:
             Dict[str, str]: 主题ID到主题名称的映射
         """
-        return {theme_id: theme["name"] for theme_id, theme in self.THEMES.items()}
+        return dict(self.get_available_themes_items())
+    
+    def get_available_themes_items(self) -> Tuple[Tuple[str, str], ...]:
+        """获取所有可用主题的 (主题ID, 主题名称) 列表，结果会被缓存
+        
+        Returns:
+            Tuple[Tuple[str, str], ...]: 按注册顺序排列的主题列表
+        """
+        if self._available_themes_cache is None:
+            self._available_themes_cache = tuple(
+                (theme_id, theme["name"]) for theme_id, theme in self.themes.items()
+            )
+        return self._available_themes_cache
     
     def set_custom_style(self, widget_type: str, style: str) -> None:
         """设置自定义样式
@@ -123,22 +254,31 @@ class ThemeManager:
             widget_type: 控件类型，如QPushButton、QLineEdit等
             style: 样式表字符串
         """
+        if self.custom_styles.get(widget_type) == style:
+            return
         self.custom_styles[widget_type] = style
-        self.apply_custom_styles()
+        
+        # 合并同一轮事件循环内的多次修改，只重新解析一次样式表
+        if not self._styles_dirty:
+            self._styles_dirty = True
+            QTimer.singleShot(0, self._flush_custom_styles)
+    
+    def _flush_custom_styles(self):
+        """应用延迟的自定义样式修改"""
+        if self._styles_dirty:
+            self.apply_custom_styles()
     
     def apply_custom_styles(self):
-        """应用自定义样式"""
-        style_sheet = """
-            QToolTip {
-                border: 1px solid #E0E0E0;
-                background-color: #FFFFFF;
-                color: #333333;
-                padding: 8px;
-                border-radius: 4px;
-            }
-        """
+        """应用基础样式及通过set_custom_style注册的自定义样式"""
+        self._styles_dirty = False
+        
+        # 基础样式表是常量，只比较自定义样式片段；未修改的片段是同一对象，比较时无需逐字符扫描
+        styles = tuple(self.custom_styles.values())
+        if styles == self._applied_styles:
+            return
         
-        QApplication.instance().setStyleSheet(style_sheet)
+        self._applied_styles = styles
+        self.app.setStyleSheet(self._BASE_STYLESHEET + "".join(styles))
     
     def load_theme_from_file(self, file_path: str) -> bool:
         """从文件加载主题
@@ -150,25 +290,99 @@ class ThemeManager:
             bool: 加载成功返回True，否则返回False
         """
         try:
-            if not os.path.exists(file_path):
+            abs_path = os.path.abspath(file_path)
+            try:
+                st = os.stat(abs_path)
+            except OSError:
                 return False
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                theme_data = json.load(f)
-            
-            # 验证主题数据
-            if not self._validate_theme_data(theme_data):
+            theme_data = self._read_theme_file(abs_path, st)
+            self._flush_theme_index()
+            if theme_data is None:
                 return False
             
-            # 添加到预定义主题
-            theme_id = theme_data.get("id", f"custom_{len(self.THEMES)}")
-            self.THEMES[theme_id] = theme_data
-            
+            # 同线程内直接触发注册
+            self.signals.theme_loaded.emit(_theme_id_for(abs_path, theme_data), theme_data)
             return True
         except Exception as e:
             print(f"加载主题文件失败: {str(e)}")
             return False
     
+    def scan_theme_directory_async(self, dir_path: str) -> None:
+        """在后台线程扫描主题目录，每加载一个主题发射一次theme_loaded信号
+        
+        Args:
+            dir_path: 主题目录路径，目录不存在时不做任何处理
+        """
+        QThreadPool.globalInstance().start(_ThemeScanWorker(self, dir_path))
+    
+    def _register_theme(self, theme_id: str, theme_data: Dict[str, Any]) -> None:
+        """将加载的主题添加到可用主题，在主线程中调用"""
+        self.themes[theme_id] = theme_data
+        self._available_themes_cache = None
+    
+    def _read_theme_file(self, abs_path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        """读取并验证主题文件，文件未变化时直接使用索引缓存
+        
+        Args:
+            abs_path: 主题文件绝对路径
+            st: 主题文件的stat结果
+            
+        Returns:
+            Optional[Dict[str, Any]]: 主题数据，格式错误时返回None
+        """
+        with self._theme_index_lock:
+            entry = self._get_theme_index().get(abs_path)
+            if self._invalid_files.get(abs_path) == st.st_mtime:
+                return None
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+            return entry["data"]
+        
+        try:
+            theme_data = _json_loads(Path(abs_path).read_bytes())
+        except ValueError as e:
+            print(f"主题文件格式错误: {abs_path}: {str(e)}")
+            theme_data = None
+        
+        if theme_data is None or not self._validate_theme_data(theme_data):
+            with self._theme_index_lock:
+                self._invalid_files[abs_path] = st.st_mtime
+                self._theme_index.pop(abs_path, None)
+                self._theme_index_dirty = True
+            return None
+        
+        with self._theme_index_lock:
+            self._invalid_files.pop(abs_path, None)
+            self._get_theme_index()[abs_path] = {
+                "mtime": st.st_mtime, "size": st.st_size, "data": theme_data
+            }
+            self._theme_index_dirty = True
+        return theme_data
+    
+    def _get_theme_index(self) -> Dict[str, Any]:
+        """获取主题索引缓存，首次调用时同时加载无效文件记录，调用方需持有_theme_index_lock"""
+        if self._theme_index is None:
+            try:
+                index = _json_loads(THEME_INDEX_PATH.read_bytes())
+                self._theme_index = index["themes"]
+                self._invalid_files = index["invalid"]
+            except (OSError, ValueError, KeyError, TypeError):
+                self._theme_index = {}
+        return self._theme_index
+    
+    def _flush_theme_index(self) -> None:
+        """将有变化的主题索引写回磁盘"""
+        with self._theme_index_lock:
+            if not self._theme_index_dirty:
+                return
+            try:
+                THEME_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+                index = {"themes": self._theme_index, "invalid": self._invalid_files}
+                THEME_INDEX_PATH.write_text(json.dumps(index, ensure_ascii=False), encoding='utf-8')
+                self._theme_index_dirty = False
+            except OSError as e:
+                print(f"保存主题索引失败: {str(e)}")
+    
     def _validate_theme_data(self, theme_data: Dict[str, Any]) -> bool:
         """验证主题数据格式是否正确
         
@@ -178,22 +392,10 @@ class ThemeManager:
         Returns:
             bool: 格式正确返回True，否则返回False
         """
-        required_keys = ["name", "style", "colors"]
-        for key in required_keys:
-            if key not in theme_data:
-                return False
-        
-        required_colors = [
-            "window", "window_text", "base", "alternate_base", "text",
-            "button", "button_text", "bright_text", "highlight",
-            "highlight_text", "link", "dark", "mid", "mid_light", "shadow"
-        ]
-        
-        for color in required_colors:
-            if color not in theme_data["colors"]:
-                return False
-        
-        return True
+        if not isinstance(theme_data, dict) or not self._REQ_TOP <= theme_data.keys():
+            return False
+        colors = theme_data["colors"]
+        return isinstance(colors, dict) and self._REQ_COLORS <= colors.keys()
 
 # 创建全局主题管理器实例
 def get_theme_manager() -> ThemeManager: